@@ -1,8 +1,12 @@
 from .decorators import log_and_catch, route_handler
 from .http_client import HTTPXClient
 from .config import get_settings
-from .dependencies import get_http_service, get_api_key
-from .lifespan import init_httpx_client, shutdown_httpx_client, init_redis_client, shutdown_redis_client
+from .dependencies import get_http_service, get_api_key, get_ws_api_key, get_request_timeout, get_admin_api_key
+from .deadline import make_deadline, run_until_disconnected
+from .lifespan import (
+    init_httpx_client, shutdown_httpx_client, init_redis_client, shutdown_redis_client, init_session_store,
+    init_loop_monitor, shutdown_loop_monitor
+)
 from .logger_config import logger
 from .session_manager import SessionManager
 
@@ -13,8 +17,16 @@ __all__ = [
     "shutdown_httpx_client",
     "init_redis_client",
     "shutdown_redis_client",
+    "init_session_store",
+    "init_loop_monitor",
+    "shutdown_loop_monitor",
     "get_http_service",
     "get_api_key",
+    "get_ws_api_key",
+    "get_request_timeout",
+    "get_admin_api_key",
+    "make_deadline",
+    "run_until_disconnected",
     "get_settings",
     "route_handler",
     "log_and_catch",
@@ -1,8 +1,18 @@
 from functools import lru_cache
+from typing import Dict, List, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     BASE_URL: str
+    # Несколько фронтенд-узлов ЕВМИАС. Если список пуст, используется только BASE_URL
+    BASE_URLS: List[str] = []
+    UPSTREAM_EWMA_ALPHA: float = 0.3
+    UPSTREAM_EJECT_AFTER_FAILURES: int = 3
+    UPSTREAM_EJECT_SECONDS: float = 30.0
+    UPSTREAM_PROBE_INTERVAL: float = 10.0
+    UPSTREAM_PROBE_PATH: str = "/"
+    UPSTREAM_PROBE_TIMEOUT: float = 5.0
     BASE_HEADERS_ORIGIN_URL: str
     BASE_HEADERS_REFERER_URL: str
 
@@ -18,9 +28,38 @@ class Settings(BaseSettings):
     REDIS_DB: int
     REDIS_COOKIES_KEY: str
     REDIS_COOKIES_TTL: int
+    REDIS_MAX_CONNECTIONS: int = 10
+    REDIS_SOCKET_TIMEOUT: float = 1.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 1.0
+
+    # Локальное хранилище сессии на случай недоступности Redis
+    SESSION_LOCAL_PATH: str = "/dev/shm/evmias_session_store.json"
+    SESSION_REDIS_RETRY_INTERVAL: float = 5.0
 
     GATEWAY_API_KEY: str
 
+    # Дифф-режим для условных запросов (A-IM: json-diff): прошлые версии списков хранятся в Redis
+    ETAG_DIFF_ENABLED: bool = True
+    ETAG_DIFF_TTL: int = 60
+    ETAG_DIFF_MAX_BYTES: int = 5_000_000
+    ETAG_DIFF_KEY_PREFIX: str = "gateway:etag:"
+    # Ключ для /admin/*. Если не задан, административные эндпоинты отключены
+    ADMIN_API_KEY: Optional[str] = None
+
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1
+    LOOP_STALL_THRESHOLD: float = 0.25
+    PROFILE_MAX_DURATION: float = 60.0
+
+    # Таймаут запроса к ЕВМИАС по умолчанию и профили для отдельных контроллеров/методов.
+    # Ключ — "c" или "c.m", например {"Common": 5, "Report.buildReport": 120}
+    UPSTREAM_TIMEOUT: float = 30.0
+    UPSTREAM_TIMEOUT_PROFILES: Dict[str, float] = {}
+
+    WS_MAX_IN_FLIGHT: int = 32
+    # Предел страниц одной автопагинации, даже если клиент не задал max_pages
+    PAGINATION_MAX_PAGES: int = 1000
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,63 @@
+# app/core/deadline.py
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+from app.core.logger_config import logger
+
+T = TypeVar("T")
+
+# Нестандартный статус nginx: клиент закрыл соединение, не дождавшись ответа
+CLIENT_CLOSED_REQUEST = 499
+
+
+def make_deadline(*timeouts: Optional[float]) -> Optional[float]:
+    """Превращает самый короткий из переданных таймаутов (в секундах) в момент по time.monotonic()."""
+    effective = [t for t in timeouts if t is not None]
+    if not effective:
+        return None
+    return time.monotonic() + min(effective)
+
+
+def earliest(*deadlines: Optional[float]) -> Optional[float]:
+    """Возвращает самый ранний из дедлайнов (None — дедлайна нет)."""
+    effective = [d for d in deadlines if d is not None]
+    return min(effective) if effective else None
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """Сколько секунд осталось до дедлайна (не меньше нуля) или None, если дедлайна нет."""
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+async def run_until_disconnected(request: Request, aw: Awaitable[T], poll_interval: float = 0.5) -> T:
+    """
+    Выполняет `aw`, отменяя его, если клиент разорвал соединение.
+    Так вся работа с ЕВМИАС (включая ретраи и переаутентификацию) прекращается вместе с запросом.
+    """
+    task = asyncio.ensure_future(aw)
+    disconnected = False
+
+    async def watch() -> None:
+        nonlocal disconnected
+        while not task.done():
+            if await request.is_disconnected():
+                disconnected = True
+                task.cancel()
+                return
+            await asyncio.sleep(poll_interval)
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if not disconnected:
+            raise
+        logger.info(f"[DEADLINE] Client disconnected, upstream work for {request.url.path} cancelled.")
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    finally:
+        watcher.cancel()
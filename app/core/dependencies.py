@@ -1,7 +1,8 @@
 # app/core/dependencies.py
 from typing import Optional
 
-from fastapi import Request, HTTPException, status, Header, Security
+from fastapi import HTTPException, status, Header, Security, WebSocket, WebSocketException
+from fastapi.requests import HTTPConnection
 from fastapi.security import APIKeyHeader
 
 from app.core import get_settings, HTTPXClient
@@ -10,24 +11,28 @@ from app.core.session_manager import SessionManager
 settings = get_settings()
 
 
-async def get_http_service(request: Request) -> HTTPXClient:
+async def get_http_service(connection: HTTPConnection) -> HTTPXClient:
     """
     Dependency-функция, которая 'собирает' и предоставляет HTTPXClient для обработчиков роутов.
+    Работает как для HTTP-запросов, так и для WebSocket-соединений.
     """
-    base_client = request.app.state.http_client
-    redis_client = request.app.state.redis_client
+    upstream_pool = connection.app.state.upstream_pool
+    session_store = connection.app.state.session_store
 
-    # Создаем SessionManager, передавая ему параметры из конфига
-    session_manager = SessionManager(
-        redis_client=redis_client,
-        cookies_key=settings.REDIS_COOKIES_KEY,
-        ttl=settings.REDIS_COOKIES_TTL
-    )
+    # Создаем SessionManager для каждого узла ЕВМИАС: cookie действуют только на своем узле
+    session_managers = {
+        node.name: SessionManager(
+            store=session_store,
+            cookies_key=node.cookies_key,
+            ttl=settings.REDIS_COOKIES_TTL
+        )
+        for node in upstream_pool.nodes
+    }
 
     # Создаем и возвращаем наш новый stateless HTTPXClient
     return HTTPXClient(
-        client=base_client,
-        session_manager=session_manager
+        pool=upstream_pool,
+        session_managers=session_managers
     )
 
 api_key_header_scheme = APIKeyHeader(name="X-API-KEY", auto_error=False)
@@ -47,3 +52,61 @@ async def get_api_key(api_key: Optional[str] = Security(api_key_header_scheme)):
             "remedy": "Please include a valid 'X-API-KEY' header in your request."
         },
     )
+
+
+# Подпротокол шлюза и префикс подпротокола с ключом для браузерных клиентов:
+# new WebSocket(url, ["evmias-gateway", "x-api-key.<ключ>"])
+WS_SUBPROTOCOL = "evmias-gateway"
+WS_API_KEY_SUBPROTOCOL_PREFIX = "x-api-key."
+
+
+async def get_ws_api_key(websocket: WebSocket) -> str:
+    """
+    Проверяет ключ при открытии WebSocket-соединения (один раз на соединение).
+    Ключ берется из заголовка X-API-KEY, а если его нет — из Sec-WebSocket-Protocol
+    (браузерный WebSocket API не позволяет задавать заголовки). Query-параметры
+    не поддерживаются: URL попадает в access-логи uvicorn и балансировщика.
+    """
+    api_key = websocket.headers.get("X-API-KEY")
+    if not api_key:
+        for subprotocol in websocket.scope.get("subprotocols", []):
+            if subprotocol.startswith(WS_API_KEY_SUBPROTOCOL_PREFIX):
+                api_key = subprotocol[len(WS_API_KEY_SUBPROTOCOL_PREFIX):]
+                break
+    if api_key and api_key == settings.GATEWAY_API_KEY:
+        return api_key
+
+    raise WebSocketException(
+        code=status.WS_1008_POLICY_VIOLATION,
+        reason="The provided X-API-KEY is missing or invalid.",
+    )
+
+
+async def get_request_timeout(
+        x_request_timeout: Optional[float] = Header(
+            default=None,
+            gt=0,
+            description="Сколько секунд клиент готов ждать ответа. По истечении запрос к ЕВМИАС отменяется."
+        )
+) -> Optional[float]:
+    """Читает таймаут клиента из заголовка X-Request-Timeout."""
+    return x_request_timeout
+
+
+admin_key_header_scheme = APIKeyHeader(name="X-ADMIN-KEY", auto_error=False)
+
+async def get_admin_api_key(api_key: Optional[str] = Security(admin_key_header_scheme)):
+    """
+    Проверяет X-ADMIN-KEY для административных эндпоинтов (профилирование, метрики).
+    """
+    if settings.ADMIN_API_KEY and api_key and api_key == settings.ADMIN_API_KEY:
+        return api_key
+
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail={
+            "error": "Authentication Failed",
+            "message": "The provided X-ADMIN-KEY is missing or invalid, or admin endpoints are disabled.",
+            "remedy": "Set ADMIN_API_KEY and include it in the 'X-ADMIN-KEY' header."
+        },
+    )
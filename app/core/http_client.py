@@ -1,14 +1,19 @@
 # app/core/http_client.py
+import asyncio
 import json
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional, Set
 
-from httpx import AsyncClient, Response, HTTPStatusError, RequestError, TimeoutException
+from fastapi import HTTPException, status
+from httpx import Response, HTTPStatusError, RequestError, TimeoutException
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 
 from app.core.config import get_settings
+from app.core.deadline import time_left
 from app.core.decorators import log_and_catch
 from app.core.logger_config import logger
 from app.core.session_manager import SessionManager  # Импортируем SessionManager
+from app.core.upstream import UpstreamNode, UpstreamPool
 
 settings = get_settings()
 
@@ -19,11 +24,55 @@ def _is_retryable_exception(exception) -> bool:
     return isinstance(exception, (RequestError, TimeoutException))
 
 
+def _is_deadline_exceeded(retry_state) -> bool:
+    deadline = retry_state.kwargs.get("deadline")
+    return deadline is not None and time.monotonic() >= deadline
+
+
+_backoff = wait_exponential(multiplier=1, min=2, max=10)
+
+
+def _wait_before_retry(retry_state) -> float:
+    """После сетевой ошибки следующая попытка идет на другой узел — ждать незачем, пока такие узлы есть."""
+    client, failed_nodes = retry_state.args[0], retry_state.kwargs.get("failed_nodes", set())
+    if isinstance(retry_state.outcome.exception(), RequestError) and len(failed_nodes) < len(client.pool.nodes):
+        return 0
+    return _backoff(retry_state)
+
+
+def _raise_attempts_exhausted(retry_state):
+    exception = retry_state.outcome.exception()
+    logger.error(f"[HTTPX] Attempt limit exceeded: {exception}")
+    raise exception
+
+
+# Таймеры event loop могут сработать чуть раньше срока, поэтому сравниваем дедлайн с запасом
+_DEADLINE_SLACK = 0.05
+
+
+def _deadline_exceeded(method: str, url: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        detail=f"Request deadline exceeded for {method} {url}"
+    )
+
+
+def resolve_upstream_timeout(params: Optional[Dict[str, Any]]) -> float:
+    """Подбирает таймаут по профилю "c.m", затем "c", иначе берет UPSTREAM_TIMEOUT."""
+    profiles = settings.UPSTREAM_TIMEOUT_PROFILES
+    if params and profiles:
+        controller, method = params.get("c"), params.get("m")
+        for key in (f"{controller}.{method}", controller):
+            if key in profiles:
+                return profiles[key]
+    return settings.UPSTREAM_TIMEOUT
+
+
 class HTTPXClient:
-    # Конструктор теперь принимает session_manager вместо lock и reauth_func
-    def __init__(self, client: AsyncClient, session_manager: SessionManager):
-        self.client = client
-        self.session_manager = session_manager
+    # Узел ЕВМИАС выбирается на каждый fetch; у каждого узла своя сессия
+    def __init__(self, pool: UpstreamPool, session_managers: Dict[str, SessionManager]):
+        self.pool = pool
+        self.session_managers = session_managers
 
     def _is_auth_error(self, response: Dict[str, Any]) -> bool: # noqa
         status_code = response.get("status_code")
@@ -54,17 +103,69 @@ class HTTPXClient:
 
     @log_and_catch(debug=settings.DEBUG_HTTP)
     async def fetch(
-            self, url: str = "/", method: str = "GET", raise_for_status: bool = True, **kwargs
+            self, url: str = "/", method: str = "GET", raise_for_status: bool = True,
+            deadline: Optional[float] = None, **kwargs
     ) -> Dict[str, Any]:
         """
         Главный метод-оркестратор. Получает сессию из Redis, выполняет запрос
         и обрабатывает ошибки авторизации, запуская переаутентификацию.
+
+        `deadline` — момент по time.monotonic(), после которого вся работа (попытки,
+        ретраи, переаутентификация) отменяется и возвращается 504.
         """
-        cookies = await self.session_manager.get_cookies()
+        # Узлы, на которых попытка упала с сетевой ошибкой: следующие попытки идут мимо них
+        failed_nodes: Set[str] = set()
+        remaining = time_left(deadline)
+        if remaining is None:
+            return await self._attempt(url, method, raise_for_status, deadline=deadline, failed_nodes=failed_nodes,
+                                       **kwargs)
+
+        try:
+            return await asyncio.wait_for(
+                self._attempt(url, method, raise_for_status, deadline=deadline, failed_nodes=failed_nodes, **kwargs),
+                remaining
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"[HTTPX] Deadline exceeded for {method} {url}, upstream work cancelled.")
+            raise _deadline_exceeded(method, url)
+        except Exception as e:
+            # Таймаут httpx, урезанный до остатка дедлайна, может сработать раньше wait_for,
+            # а ретраи останавливаются по дедлайну с последней ошибкой — это тоже 504
+            if _is_retryable_exception(e) and time_left(deadline) <= _DEADLINE_SLACK:
+                logger.warning(f"[HTTPX] Deadline exceeded for {method} {url}: {e!r}")
+                raise _deadline_exceeded(method, url) from e
+            raise
+
+    @retry(
+        stop=stop_after_attempt(5) | _is_deadline_exceeded, wait=_wait_before_retry,
+        retry=retry_if_exception(_is_retryable_exception),
+        retry_error_callback=_raise_attempts_exhausted,
+        before_sleep=lambda r: logger.warning(f"[HTTPX] Attempt {r.attempt_number} failed: {r.outcome.exception()}")
+    )
+    async def _attempt(
+            self, url: str, method: str, raise_for_status: bool, deadline: Optional[float] = None,
+            failed_nodes: Optional[Set[str]] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Одна попытка: выбирает узел (минуя упавшие) и выполняет запрос с его сессией."""
+        failed_nodes = failed_nodes if failed_nodes is not None else set()
+        node = self.pool.choose(exclude=failed_nodes)
+        try:
+            return await self._fetch(node, url, method, raise_for_status, deadline, **kwargs)
+        except RequestError:
+            failed_nodes.add(node.name)
+            raise
+
+    async def _fetch(
+            self, node: UpstreamNode, url: str, method: str, raise_for_status: bool, deadline: Optional[float],
+            **kwargs
+    ) -> Dict[str, Any]:
+        session_manager = self.session_managers[node.name]
+        cookies = await session_manager.get_cookies()
 
         # Первая попытка с текущими cookie (или без них)
         response_dict = await self._execute_fetch(
-            url=url, method=method, raise_for_status=raise_for_status, cookies=cookies, **kwargs
+            node, url=url, method=method, raise_for_status=raise_for_status, deadline=deadline, cookies=cookies,
+            **kwargs
         )
 
         # Если все хорошо, возвращаем результат
@@ -74,25 +175,46 @@ class HTTPXClient:
         logger.warning(f"[HTTPX] Authorization error for {method} {url}. Attempting re-authentication.")
 
         # Запускаем переаутентификацию через SessionManager
-        final_cookies = await self.session_manager.re_authenticate(self)
+        final_cookies = await session_manager.re_authenticate(node.client, deadline=deadline)
 
         logger.info(f"[HTTPX] Retrying original request to {method} {url} with fresh cookies.")
         # Вторая и последняя попытка с новыми cookie
         final_response_dict = await self._execute_fetch(
-            url=url, method=method, raise_for_status=raise_for_status, cookies=final_cookies, **kwargs
+            node, url=url, method=method, raise_for_status=raise_for_status, deadline=deadline, cookies=final_cookies,
+            **kwargs
         )
 
         return final_response_dict
 
-    @retry(
-        stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception(_is_retryable_exception),
-        retry_error_callback=lambda rs: logger.error(f"[HTTPX] Attempt limit exceeded: {rs.outcome.exception()}"),
-        before_sleep=lambda r: logger.warning(f"[HTTPX] Attempt {r.attempt_number} failed: {r.outcome.exception()}")
-    )
-    async def _execute_fetch(self, url: str, method: str, raise_for_status: bool, **kwargs) -> Dict[str, Any]:
-        """Приватный метод-исполнитель. Выполняет один HTTP-запрос."""
-        response = await self.client.request(method=method, url=url, timeout=30.0, **kwargs)
+    async def _execute_fetch(
+            self, node: UpstreamNode, url: str, method: str, raise_for_status: bool,
+            deadline: Optional[float] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Приватный метод-исполнитель. Выполняет один HTTP-запрос к узлу `node` и учитывает его результат."""
+        timeout = resolve_upstream_timeout(kwargs.get("params"))
+        remaining = time_left(deadline)
+        # Таймаут урезан дедлайном клиента: его срабатывание — не вина узла
+        capped_by_deadline = remaining is not None and remaining < timeout
+        if capped_by_deadline:
+            timeout = max(remaining, 0.001)
+
+        node.in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await node.client.request(method=method, url=url, timeout=timeout, **kwargs)
+        except TimeoutException as e:
+            if capped_by_deadline:
+                # Не учитываем узлу ошибку и не уходим на другой узел: время клиента вышло
+                raise asyncio.TimeoutError(f"Deadline reached while waiting for {node.name}") from e
+            self.pool.record(node, latency=None, ok=False)
+            raise
+        except RequestError:
+            self.pool.record(node, latency=None, ok=False)
+            raise
+        finally:
+            node.in_flight -= 1
+        self.pool.record(node, latency=time.perf_counter() - started, ok=response.status_code < 500)
+
         processed_result = self._process_response(response, url)
 
         if raise_for_status and not self._is_auth_error(processed_result) and response.status_code >= 400:
@@ -5,6 +5,9 @@ from fastapi import FastAPI
 
 from app.core import get_settings
 from app.core.logger_config import logger
+from app.core.loop_monitor import LoopLagMonitor
+from app.core.session_store import RedisSessionStore, LocalSessionStore, ResilientSessionStore
+from app.core.upstream import UpstreamNode, UpstreamPool
 
 settings = get_settings()
 
@@ -16,46 +19,92 @@ async def init_httpx_client(app: FastAPI):
         "X-Requested-With": "XMLHttpRequest",
     }
 
+    base_urls = settings.BASE_URLS or [settings.BASE_URL]
+
     try:
-        base_client = httpx.AsyncClient(
-            base_url=settings.BASE_URL,
-            headers=base_headers,
-            timeout=30.0,
-            verify=False  # TODO: убрать verify=False
+        nodes = [
+            UpstreamNode(
+                base_url=base_url,
+                client=httpx.AsyncClient(
+                    base_url=base_url,
+                    headers=base_headers,
+                    timeout=settings.UPSTREAM_TIMEOUT,
+                    verify=False  # TODO: убрать verify=False
+                ),
+                # При одном узле ключ прежний, чтобы не терять уже сохраненную сессию
+                cookies_key=settings.REDIS_COOKIES_KEY if len(base_urls) == 1 else (
+                    f"{settings.REDIS_COOKIES_KEY}:{base_url}"
+                ),
+            )
+            for base_url in base_urls
+        ]
+        app.state.upstream_pool = UpstreamPool(
+            nodes=nodes,
+            alpha=settings.UPSTREAM_EWMA_ALPHA,
+            eject_after=settings.UPSTREAM_EJECT_AFTER_FAILURES,
+            eject_seconds=settings.UPSTREAM_EJECT_SECONDS,
         )
-        app.state.http_client = base_client
-        logger.info("Base HTTPX client and auth lock initialized.")
+        logger.info(f"HTTPX clients initialized for {len(nodes)} EVMIAS node(s): {', '.join(base_urls)}")
     except Exception as e:
         logger.critical(f"CRITICAL: Failed to initialize HTTPX client: {e}", exc_info=True)
         raise RuntimeError(f"Failed to initialize HTTPX client: {e}")
 
+    if len(base_urls) > 1:
+        app.state.upstream_pool.start_probing(
+            interval=settings.UPSTREAM_PROBE_INTERVAL,
+            path=settings.UPSTREAM_PROBE_PATH,
+            timeout=settings.UPSTREAM_PROBE_TIMEOUT,
+        )
+        logger.info(f"Upstream health probing started (every {settings.UPSTREAM_PROBE_INTERVAL}s).")
+
 
 async def shutdown_httpx_client(app: FastAPI):
-    if hasattr(app.state, 'http_client') and app.state.http_client:
+    if hasattr(app.state, 'upstream_pool') and app.state.upstream_pool:
         try:
-            await app.state.http_client.aclose()
-            logger.info("Base HTTPX client is closed")
+            await app.state.upstream_pool.stop_probing()
+            await app.state.upstream_pool.aclose()
+            logger.info("HTTPX clients are closed")
         except Exception as e:
-            logger.error(f"Base HTTPX client is closed: {e}", exc_info=True)
+            logger.error(f"Error close HTTPX clients: {e}", exc_info=True)
 
 
 async def init_redis_client(app: FastAPI):
-    """Инициализирует и сохраняет Redis клиент в app.state. При ошибке приложение падает и не стартует."""
+    """
+    Инициализирует и сохраняет Redis клиент в app.state.
+    Если Redis недоступен при старте, приложение все равно стартует: сессия хранится локально
+    до восстановления Redis (см. ResilientSessionStore).
+    """
     try:
         redis_pool = redis.ConnectionPool.from_url(
             url=f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}",
             decode_responses=True,
-            max_connections=10
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
         )
         redis_client = redis.Redis(connection_pool=redis_pool)
-        await redis_client.ping()  # Проверка соединения
         app.state.redis_client = redis_client
+    except Exception as e:
+        logger.critical(f"CRITICAL: Failed to create Redis client: {e}", exc_info=True)
+        raise RuntimeError(f"Failed to create Redis client: {e}")
+
+    try:
+        await redis_client.ping()  # Проверка соединения
         logger.info(
             f"Redis client connected to {settings.REDIS_HOST}:{settings.REDIS_PORT}"
         )
     except Exception as e:
-        logger.critical(f"CRITICAL: Failed to connect to Redis: {e}", exc_info=True)
-        raise RuntimeError(f"Failed to connect to Redis: {e}")
+        logger.error(f"Redis is unavailable at startup, running in degraded mode: {e}")
+
+
+async def init_session_store(app: FastAPI):
+    """Создает хранилище сессии: Redis с автоматическим переходом на локальное хранилище."""
+    app.state.session_store = ResilientSessionStore(
+        primary=RedisSessionStore(app.state.redis_client),
+        fallback=LocalSessionStore(settings.SESSION_LOCAL_PATH),
+        retry_interval=settings.SESSION_REDIS_RETRY_INTERVAL,
+    )
+    logger.info(f"Session store initialized (local fallback: {settings.SESSION_LOCAL_PATH}).")
 
 
 async def shutdown_redis_client(app: FastAPI):
@@ -66,3 +115,23 @@ async def shutdown_redis_client(app: FastAPI):
             logger.info("Redis client is closed")
         except Exception as e:
             logger.error(f"Error close Redis client: {e}", exc_info=True)
+
+
+async def init_loop_monitor(app: FastAPI):
+    """Запускает мониторинг задержки цикла событий (если включен в настройках)."""
+    app.state.loop_monitor = None
+    if not settings.LOOP_MONITOR_ENABLED:
+        return
+    monitor = LoopLagMonitor(
+        interval=settings.LOOP_MONITOR_INTERVAL,
+        stall_threshold=settings.LOOP_STALL_THRESHOLD,
+    )
+    monitor.start()
+    app.state.loop_monitor = monitor
+    logger.info(f"Event loop lag monitor started (stall threshold {settings.LOOP_STALL_THRESHOLD}s).")
+
+
+async def shutdown_loop_monitor(app: FastAPI):
+    if getattr(app.state, 'loop_monitor', None):
+        await app.state.loop_monitor.stop()
+        logger.info("Event loop lag monitor stopped")
@@ -0,0 +1,109 @@
+# app/core/loop_monitor.py
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional
+
+from app.core.logger_config import logger
+
+# Верхние границы корзин гистограммы задержки цикла событий, в секундах
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf"))
+
+
+class LoopLagMonitor:
+    """
+    Следит за задержкой цикла событий.
+
+    Корутина-пульс раз в `interval` секунд засыпает и меряет, насколько позже запланированного
+    она проснулась — это и есть лаг. Отдельный поток-сторож замечает, что пульс не обновлялся
+    дольше `stall_threshold`, и логирует стек потока цикла событий в момент зависания,
+    т.е. код, который блокирует цикл.
+    """
+
+    def __init__(self, interval: float, stall_threshold: float):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.loop_thread_id: Optional[int] = None
+
+        self._last_tick = time.monotonic()
+        self._reported_tick: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        self._samples = 0
+        self._lag_sum = 0.0
+        self._lag_max = 0.0
+        self._lag_last = 0.0
+        self._stalls = 0
+        self._buckets = [0] * len(LAG_BUCKETS)
+
+    def start(self) -> None:
+        self.loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._watchdog:
+            await asyncio.to_thread(self._watchdog.join, self.stall_threshold)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._record(max(now - started - self.interval, 0.0))
+            self._last_tick = now
+
+    def _record(self, lag: float) -> None:
+        self._samples += 1
+        self._lag_sum += lag
+        self._lag_last = lag
+        self._lag_max = max(self._lag_max, lag)
+        for i, bound in enumerate(LAG_BUCKETS):
+            if lag <= bound:
+                self._buckets[i] += 1
+                break
+        if lag >= self.stall_threshold:
+            self._stalls += 1
+            logger.warning(f"[LOOP] Event loop was blocked for {lag:.3f}s")
+
+    def _watch(self) -> None:
+        check_interval = max(self.stall_threshold / 2, 0.01)
+        while not self._stopped.wait(check_interval):
+            last_tick = self._last_tick
+            blocked_for = time.monotonic() - last_tick - self.interval
+            if blocked_for < self.stall_threshold or self._reported_tick == last_tick:
+                continue
+            # Сообщаем о каждом зависании один раз, пока цикл не проснется
+            self._reported_tick = last_tick
+            frame = sys._current_frames().get(self.loop_thread_id)  # noqa
+            stack = "".join(traceback.format_stack(frame)) if frame else "<loop thread not found>"
+            logger.warning(f"[LOOP] Event loop blocked for more than {blocked_for:.3f}s, current stack:\n{stack}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Текущие метрики задержки цикла событий (накопительные с момента старта)."""
+        histogram: List[Dict[str, Any]] = []
+        cumulative = 0
+        for bound, count in zip(LAG_BUCKETS, self._buckets):
+            cumulative += count
+            histogram.append({"le": "+Inf" if bound == float("inf") else bound, "count": cumulative})
+        return {
+            "interval": self.interval,
+            "stall_threshold": self.stall_threshold,
+            "samples": self._samples,
+            "lag_last": round(self._lag_last, 6),
+            "lag_max": round(self._lag_max, 6),
+            "lag_avg": round(self._lag_sum / self._samples, 6) if self._samples else 0.0,
+            "lag_sum": round(self._lag_sum, 6),
+            "stalls": self._stalls,
+            "histogram": histogram,
+        }
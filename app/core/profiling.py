@@ -0,0 +1,106 @@
+# app/core/profiling.py
+import asyncio
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List
+
+from app.core.logger_config import logger
+
+# Одновременно снимается не больше одного профиля: иначе профили искажают друг друга
+profiling_lock = asyncio.Lock()
+
+
+def _folded_stack(frame) -> str:
+    """Стек в формате folded (корень слева, через ';') — понятен flamegraph.pl и speedscope."""
+    parts: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def _sample_thread(thread_id: int, duration: float, interval: float) -> Counter:
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)  # noqa
+        if frame is not None:
+            stacks[_folded_stack(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+async def sample_cpu_profile(thread_id: int, duration: float, interval: float, top: int) -> Dict[str, Any]:
+    """
+    Семплирующий профиль потока `thread_id` (обычно поток цикла событий).
+    Семплы снимаются из отдельного потока, поэтому профилируемый код не замедляется заметно.
+    """
+    logger.info(f"[PROFILE] CPU sampling started for {duration}s (interval {interval}s).")
+    stacks = await asyncio.to_thread(_sample_thread, thread_id, duration, interval)
+    total = sum(stacks.values())
+
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+
+    return {
+        "duration": duration,
+        "interval": interval,
+        "samples": total,
+        "top_functions": [
+            {"function": func, "samples": count, "percent": round(100 * count / total, 2)}
+            for func, count in leaves.most_common(top)
+        ],
+        "folded": [f"{stack} {count}" for stack, count in stacks.most_common(top)],
+    }
+
+
+async def tracemalloc_diff(duration: float, top: int, frames: int) -> Dict[str, Any]:
+    """
+    Снимает два снимка tracemalloc с интервалом `duration` и возвращает строки кода
+    с наибольшим приростом выделенной памяти. Если трассировка не была включена,
+    она включается только на время замера.
+    Снимки и их сравнение обходят все трассы и занимают заметное время, поэтому
+    выполняются в отдельном потоке, чтобы не блокировать event loop.
+    """
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+
+    def take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(filters)
+
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    logger.info(f"[PROFILE] tracemalloc diff started for {duration}s.")
+    try:
+        before = await asyncio.to_thread(take_snapshot)
+        await asyncio.sleep(duration)
+        after = await asyncio.to_thread(take_snapshot)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    all_stats = await asyncio.to_thread(after.compare_to, before, "traceback" if frames > 1 else "lineno")
+    stats = all_stats[:top]
+    return {
+        "duration": duration,
+        "traced_current": current,
+        "traced_peak": peak,
+        "top": [
+            {
+                "traceback": stat.traceback.format(),
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff,
+                "count": stat.count,
+            }
+            for stat in stats
+        ],
+    }
@@ -1,40 +1,41 @@
 # app/core/session_manager.py
 import json
-from typing import Dict, TYPE_CHECKING
-from redis.asyncio import Redis
+from typing import Dict, Optional
+
+from httpx import AsyncClient
+
+from app.core.deadline import time_left
 from app.core.logger_config import logger
+from app.core.session_store import SessionStore
 from app.service import perform_re_authentication
 
-if TYPE_CHECKING:
-    from app.core.http_client import HTTPXClient
-
 
 class SessionManager:
-    def __init__(self, redis_client: Redis, cookies_key: str, ttl: int):
-        self.redis = redis_client
+    def __init__(self, store: SessionStore, cookies_key: str, ttl: int):
+        self.store = store
         self.cookies_key = cookies_key
         self.ttl = ttl
         self.lock_key = f"{cookies_key}:lock"
 
     async def get_cookies(self) -> Dict[str, str] | None:
-        """Получает cookie из Redis."""
-        json_cookies = await self.redis.get(self.cookies_key)
+        """Получает cookie из хранилища сессии."""
+        json_cookies = await self.store.get(self.cookies_key)
         if not json_cookies:
-            logger.info("[SESSION] Cookies not found in Redis.")
+            logger.info("[SESSION] Cookies not found in session store.")
             return None
-        logger.debug("[SESSION] Cookies successfully retrieved from Redis.")
+        logger.debug("[SESSION] Cookies successfully retrieved from session store.")
         return json.loads(json_cookies)
 
     async def save_cookies(self, cookies: Dict[str, str]) -> None:
-        """Сохраняет cookie в Redis с установкой времени жизни."""
+        """Сохраняет cookie в хранилище сессии с установкой времени жизни."""
         json_cookies = json.dumps(cookies)
-        await self.redis.set(self.cookies_key, json_cookies, ex=self.ttl)
-        logger.info(f"[SESSION] Cookies saved to Redis with TTL {self.ttl}s.")
+        await self.store.set(self.cookies_key, json_cookies, self.ttl)
+        logger.info(f"[SESSION] Cookies saved to session store with TTL {self.ttl}s.")
 
-    async def re_authenticate(self, http_client: "HTTPXClient") -> Dict[str, str]:
+    async def re_authenticate(self, http_client: AsyncClient, deadline: Optional[float] = None) -> Dict[str, str]:
         logger.warning("[SESSION] Re-authentication process started.")
-        async with self.redis.lock(self.lock_key, timeout=60):
-            logger.info("[SESSION] Acquired distributed lock for re-authentication.")
+        async with self.store.lock(self.lock_key, timeout=60, blocking_timeout=time_left(deadline)):
+            logger.info("[SESSION] Acquired lock for re-authentication.")
             cookies = await self.get_cookies()
             if cookies:
                 logger.info("[SESSION] Cookies were updated by another process. Using fresh cookies.")
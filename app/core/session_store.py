@@ -0,0 +1,264 @@
+# app/core/session_store.py
+import asyncio
+import fcntl
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager, contextmanager, AsyncExitStack
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, IO
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, LockError
+
+from app.core.logger_config import logger
+
+# Ошибки, по которым считаем Redis недоступным и переключаемся на локальное хранилище
+_UNAVAILABLE_ERRORS = (RedisError, OSError, asyncio.TimeoutError)
+
+
+class SessionLockTimeout(TimeoutError):
+    """Блокировку не удалось получить за отведенное время (хранилище при этом доступно)."""
+
+
+class SessionStore(ABC):
+    """Хранилище сессионных данных: строковые значения с TTL и именованные блокировки."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        ...
+
+    @abstractmethod
+    def lock(self, name: str, timeout: float, blocking_timeout: Optional[float] = None):
+        """Возвращает async context manager, удерживающий блокировку `name`."""
+        ...
+
+
+class RedisSessionStore(SessionStore):
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self.redis.set(key, value, ex=ttl)
+
+    async def set_if_missing(self, key: str, value: str, ttl: int) -> bool:
+        """SET NX: записывает, только если ключа нет. Возвращает True, если значение записано."""
+        return bool(await self.redis.set(key, value, ex=ttl, nx=True))
+
+    @asynccontextmanager
+    async def lock(self, name: str, timeout: float, blocking_timeout: Optional[float] = None) -> AsyncIterator[None]:
+        lock = self.redis.lock(name, timeout=timeout, blocking_timeout=blocking_timeout)
+        if not await lock.acquire():
+            raise SessionLockTimeout(f"Could not acquire Redis lock '{name}' in {blocking_timeout}s")
+        try:
+            yield
+        finally:
+            try:
+                await lock.release()
+            except (LockError, RedisError) as e:
+                logger.warning(f"[SESSION] Failed to release Redis lock '{name}': {e}")
+
+
+class LocalSessionStore(SessionStore):
+    """
+    Локальное хранилище на файле (по умолчанию в /dev/shm, т.е. в разделяемой памяти),
+    общее для всех воркеров на хосте. Доступ сериализуется через flock.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        self.path = path
+        self.poll_interval = poll_interval
+
+    @contextmanager
+    def _open(self, operation: int) -> Iterator[IO[str]]:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, "r+", encoding="utf-8") as f:
+            fcntl.flock(f, operation)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _read(f: IO[str]) -> Dict[str, Dict]:
+        f.seek(0)
+        raw = f.read()
+        if not raw:
+            return {}
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning("[SESSION] Local session store is corrupted, starting from scratch.")
+            return {}
+
+    def _get_sync(self, key: str) -> Optional[Tuple[str, int]]:
+        with self._open(fcntl.LOCK_SH) as f:
+            entry = self._read(f).get(key)
+        ttl = int(entry["expires_at"] - time.time()) if entry else 0
+        if ttl < 1:
+            return None
+        return entry["value"], ttl
+
+    def _set_sync(self, key: str, value: str, ttl: int) -> None:
+        now = time.time()
+        with self._open(fcntl.LOCK_EX) as f:
+            data = {k: v for k, v in self._read(f).items() if v["expires_at"] > now}
+            data[key] = {"value": value, "expires_at": now + ttl}
+            f.seek(0)
+            f.truncate()
+            json.dump(data, f)
+            f.flush()
+
+    def _entries_sync(self) -> List[Tuple[str, str, int]]:
+        now = time.time()
+        with self._open(fcntl.LOCK_SH) as f:
+            data = self._read(f)
+        return [
+            (key, entry["value"], int(entry["expires_at"] - now))
+            for key, entry in data.items()
+            if entry["expires_at"] - now >= 1
+        ]
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = await self.get_with_ttl(key)
+        return entry[0] if entry else None
+
+    async def get_with_ttl(self, key: str) -> Optional[Tuple[str, int]]:
+        """Возвращает значение и оставшийся TTL (в секундах) или None."""
+        return await asyncio.to_thread(self._get_sync, key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await asyncio.to_thread(self._set_sync, key, value, ttl)
+
+    async def entries(self) -> List[Tuple[str, str, int]]:
+        """Возвращает (key, value, оставшийся TTL) для всех неистекших записей."""
+        return await asyncio.to_thread(self._entries_sync)
+
+    @asynccontextmanager
+    async def lock(self, name: str, timeout: float, blocking_timeout: Optional[float] = None) -> AsyncIterator[None]:
+        # flock снимается ядром при смерти процесса, поэтому `timeout` (время жизни) здесь не нужен
+        lock_path = f"{self.path}.{name.replace(':', '_').replace('/', '_')}.lock"
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        deadline = time.monotonic() + (blocking_timeout if blocking_timeout is not None else timeout)
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise SessionLockTimeout(f"Could not acquire local lock '{name}'")
+                    await asyncio.sleep(self.poll_interval)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+class ResilientSessionStore(SessionStore):
+    """
+    Redis как основное хранилище и локальное как запасное.
+
+    Все записи дублируются в локальное хранилище, чтобы при падении Redis воркеры
+    продолжили работать с актуальной сессией без переаутентификации. Пока Redis недоступен,
+    он опрашивается не чаще одного раза в `retry_interval` секунд; после восстановления
+    все неистекшие локальные записи переносятся обратно в Redis. Промах в Redis тоже
+    проверяется по локальной копии: Redis мог перезапуститься и потерять данные.
+    """
+
+    def __init__(self, primary: RedisSessionStore, fallback: LocalSessionStore, retry_interval: float):
+        self.primary = primary
+        self.fallback = fallback
+        self.retry_interval = retry_interval
+        self._degraded_since: Optional[float] = None
+        self._retry_at = 0.0
+
+    @property
+    def degraded(self) -> bool:
+        return self._degraded_since is not None
+
+    def _primary_available(self) -> bool:
+        return not self.degraded or time.monotonic() >= self._retry_at
+
+    def _mark_degraded(self, error: BaseException) -> None:
+        if not self.degraded:
+            logger.error(f"[SESSION] Redis is unavailable, switching to local session store: {error!r}")
+            self._degraded_since = time.time()
+        self._retry_at = time.monotonic() + self.retry_interval
+
+    async def _mark_recovered(self) -> None:
+        if not self.degraded:
+            return
+        self._degraded_since = None
+        logger.info("[SESSION] Redis is available again, syncing local session data back.")
+        try:
+            # Только недостающие ключи: пока этот воркер был в деградации, другие могли записать
+            # в Redis более свежие значения
+            for key, value, ttl in await self.fallback.entries():
+                await self.primary.set_if_missing(key, value, ttl)
+        except _UNAVAILABLE_ERRORS as e:
+            self._mark_degraded(e)
+
+    async def get(self, key: str) -> Optional[str]:
+        if self._primary_available():
+            try:
+                value = await self.primary.get(key)
+            except _UNAVAILABLE_ERRORS as e:
+                self._mark_degraded(e)
+            else:
+                await self._mark_recovered()
+                if value is not None:
+                    return value
+                return await self._restore_from_fallback(key)
+        return await self.fallback.get(key)
+
+    async def _restore_from_fallback(self, key: str) -> Optional[str]:
+        """Берет значение из локальной копии и заново кладет его в Redis."""
+        entry = await self.fallback.get_with_ttl(key)
+        if entry is None:
+            return None
+        value, ttl = entry
+        try:
+            if await self.primary.set_if_missing(key, value, ttl):
+                logger.info(f"[SESSION] Key '{key}' was missing in Redis, restored from local session store.")
+                return value
+            # Кто-то успел записать значение между GET и SET NX — оно свежее локального
+            return await self.primary.get(key) or value
+        except _UNAVAILABLE_ERRORS as e:
+            self._mark_degraded(e)
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self.fallback.set(key, value, ttl)
+        if self._primary_available():
+            try:
+                await self.primary.set(key, value, ttl)
+            except _UNAVAILABLE_ERRORS as e:
+                self._mark_degraded(e)
+            else:
+                await self._mark_recovered()
+
+    @asynccontextmanager
+    async def lock(self, name: str, timeout: float, blocking_timeout: Optional[float] = None) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            acquired = False
+            if self._primary_available():
+                try:
+                    await stack.enter_async_context(self.primary.lock(name, timeout, blocking_timeout))
+                    acquired = True
+                except SessionLockTimeout:
+                    raise
+                except _UNAVAILABLE_ERRORS as e:
+                    self._mark_degraded(e)
+            if not acquired:
+                await stack.enter_async_context(self.fallback.lock(name, timeout, blocking_timeout))
+            yield
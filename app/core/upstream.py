@@ -0,0 +1,130 @@
+# app/core/upstream.py
+import asyncio
+import random
+import time
+from typing import Collection, List, Optional
+from urllib.parse import urlparse
+
+from httpx import AsyncClient
+
+from app.core.logger_config import logger
+
+
+class UpstreamNode:
+    """Один фронтенд-узел ЕВМИАС со своим пулом соединений и статистикой ответов."""
+
+    def __init__(self, base_url: str, client: AsyncClient, cookies_key: str):
+        self.base_url = base_url
+        self.name = urlparse(base_url).netloc or base_url
+        self.client = client
+        # Cookie сессии действуют только на том узле, где получены
+        self.cookies_key = cookies_key
+
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+    def score(self, unknown_latency: float) -> float:
+        """
+        Чем меньше, тем лучше. Узлу без замеров задержки (например, только падавшему)
+        приписывается `unknown_latency`; доля ошибок штрафуется и при нулевой задержке.
+        """
+        latency = self.latency_ewma if self.latency_ewma is not None else unknown_latency
+        latency += unknown_latency * self.error_ewma
+        return latency * (1 + self.in_flight) / max(1.0 - self.error_ewma, 0.05)
+
+
+class UpstreamPool:
+    """
+    Набор узлов ЕВМИАС с маршрутизацией по принципу power of two choices:
+    из двух случайных здоровых узлов выбирается тот, у кого меньше EWMA задержки
+    с поправкой на долю ошибок и число запросов в работе.
+
+    Узел исключается из ротации на `eject_seconds` после `eject_after` ошибок подряд
+    (пассивная проверка) и возвращается досрочно, если прошел активную проверку.
+    """
+
+    def __init__(self, nodes: List[UpstreamNode], alpha: float, eject_after: int, eject_seconds: float):
+        if not nodes:
+            raise ValueError("Upstream pool requires at least one node")
+        self.nodes = nodes
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._probe_task: Optional[asyncio.Task] = None
+
+    def choose(self, exclude: Collection[str] = ()) -> UpstreamNode:
+        """Выбирает узел, по возможности минуя исключенные из ротации и перечисленные в `exclude`."""
+        candidates = (
+            [node for node in self.nodes if not node.ejected and node.name not in exclude]
+            or [node for node in self.nodes if node.name not in exclude]
+            or [node for node in self.nodes if not node.ejected]
+            # Все узлы исключены — лучше попробовать, чем сразу отказать
+            or self.nodes
+        )
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        unknown_latency = self._worst_latency()
+        return first if first.score(unknown_latency) <= second.score(unknown_latency) else second
+
+    def _worst_latency(self) -> float:
+        """Худшая известная EWMA задержки в пуле (1 секунда, если замеров еще нет)."""
+        known = [node.latency_ewma for node in self.nodes if node.latency_ewma is not None]
+        return max(known) if known else 1.0
+
+    def record(self, node: UpstreamNode, latency: Optional[float], ok: bool) -> None:
+        """Учитывает результат запроса к узлу. `latency` не передается для неудачных попыток."""
+        if latency is not None:
+            node.latency_ewma = latency if node.latency_ewma is None else (
+                    self.alpha * latency + (1 - self.alpha) * node.latency_ewma
+            )
+        node.error_ewma = self.alpha * (0.0 if ok else 1.0) + (1 - self.alpha) * node.error_ewma
+
+        if ok:
+            node.consecutive_failures = 0
+            return
+        node.consecutive_failures += 1
+        if node.consecutive_failures >= self.eject_after and not node.ejected:
+            node.ejected_until = time.monotonic() + self.eject_seconds
+            logger.warning(
+                f"[UPSTREAM] Node {node.name} ejected for {self.eject_seconds}s "
+                f"after {node.consecutive_failures} consecutive failures."
+            )
+
+    async def _probe(self, node: UpstreamNode, path: str, timeout: float) -> None:
+        try:
+            response = await node.client.get(path, timeout=timeout)
+            ok = response.status_code < 500
+        except Exception as e:
+            logger.debug(f"[UPSTREAM] Probe of {node.name} failed: {e!r}")
+            ok = False
+
+        if ok and node.ejected:
+            node.ejected_until = 0.0
+            node.consecutive_failures = 0
+            logger.info(f"[UPSTREAM] Node {node.name} passed health probe and is back in rotation.")
+        elif not ok:
+            self.record(node, latency=None, ok=False)
+
+    async def _probe_loop(self, interval: float, path: str, timeout: float) -> None:
+        while True:
+            await asyncio.gather(*(self._probe(node, path, timeout) for node in self.nodes))
+            await asyncio.sleep(interval)
+
+    def start_probing(self, interval: float, path: str, timeout: float) -> None:
+        self._probe_task = asyncio.create_task(self._probe_loop(interval, path, timeout))
+
+    async def stop_probing(self) -> None:
+        if self._probe_task:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(node.client.aclose() for node in self.nodes))
@@ -10,8 +10,11 @@ from app.core import (
     shutdown_httpx_client,
     init_redis_client,
     shutdown_redis_client,
+    init_session_store,
+    init_loop_monitor,
+    shutdown_loop_monitor,
 )
-from app.route import gateway_router
+from app.route import gateway_router, gateway_ws_router, admin_router
 
 
 @asynccontextmanager
@@ -19,9 +22,12 @@ async def lifespan(app: FastAPI):  # noqa
     logger.info("Starting application...")
     await init_httpx_client(app)
     await init_redis_client(app)
+    await init_session_store(app)
+    await init_loop_monitor(app)
     logger.info("Initialization completed.")
     yield
     logger.info("Shutting down application...")
+    await shutdown_loop_monitor(app)
     await shutdown_httpx_client(app)
     await shutdown_redis_client(app)
     logger.info("Resources released.")
@@ -36,6 +42,9 @@ app = FastAPI(
     Основные возможности:
     *   Автоматическое управление сессией: Сервис самостоятельно выполняет аутентификацию и поддерживает сессию активной.
     *   Универсальный шлюз: Позволяет выполнять произвольные запросы к API ЕВМИАС через единый эндпоинт `/gateway/request`.
+    *   Автопагинация: `/gateway/paginate` — параллельная выгрузка всех страниц списка потоком NDJSON.
+    *   Несколько узлов ЕВМИАС (`BASE_URLS`): выбор узла по задержке и доле ошибок, исключение и проверка узлов.
+    *   Мультиплексированный канал: `/gateway/ws` — одно WebSocket-соединение для множества конкурентных запросов.
     *   Централизованное логирование и обработка ошибок.
     """,
 )
@@ -48,6 +57,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Без этого браузерный JS не видит ETag и не может слать If-None-Match / A-IM
+    expose_headers=["ETag", "IM", "Delta-Base"],
 )
 
 app.include_router(gateway_router)
+app.include_router(gateway_ws_router)
+app.include_router(admin_router)
@@ -1,6 +1,9 @@
-from .gateway import GatewayRequest
+from .gateway import GatewayRequest, GatewayWsMessage, PaginatedGatewayRequest, PaginationParams
 
 
 __all__ = [
     "GatewayRequest",
+    "GatewayWsMessage",
+    "PaginatedGatewayRequest",
+    "PaginationParams",
 ]
\ No newline at end of file
@@ -31,3 +31,54 @@ class GatewayRequest(BaseModel):
         description="Тело запроса (payload) для POST-запросов.",
         examples=[{"is_activerules": "true"}]
     )
+
+    timeout: Optional[float] = Field(
+        default=None,
+        gt=0,
+        description="Сколько секунд клиент готов ждать ответа. По истечении вся работа с ЕВМИАС "
+                    "прекращается и возвращается 504. Аналог заголовка X-Request-Timeout.",
+        examples=[5]
+    )
+
+
+class GatewayWsMessage(BaseModel):
+    """
+    Model for a tagged gateway request sent over the WebSocket channel
+    """
+    id: str = Field(
+        ...,
+        description="Идентификатор запроса. Возвращается в ответе без изменений, "
+                    "по нему клиент сопоставляет ответы, приходящие в произвольном порядке.",
+        examples=["42"]
+    )
+
+    request: GatewayRequest
+
+
+class PaginationParams(BaseModel):
+    start_field: str = Field(default="start", description="Поле в `data` со смещением страницы.")
+    limit_field: str = Field(default="limit", description="Поле в `data` с размером страницы.")
+    page_size: int = Field(default=100, gt=0, le=10000, description="Размер страницы.")
+    max_concurrency: int = Field(
+        default=4, ge=1, le=16,
+        description="Сколько страниц запрашивается у ЕВМИАС одновременно."
+    )
+    records_field: Optional[str] = Field(
+        default="data",
+        description="Поле ответа со списком записей. Если ответ сам является списком, поле не используется."
+    )
+    total_field: Optional[str] = Field(
+        default="totalCount",
+        description="Поле ответа с общим числом записей. Если его нет, выгрузка идет до первой неполной страницы."
+    )
+    max_pages: Optional[int] = Field(
+        default=None, gt=0,
+        description="Ограничение на число страниц. Не может превышать серверный предел PAGINATION_MAX_PAGES."
+    )
+
+
+class PaginatedGatewayRequest(GatewayRequest):
+    """
+    Model for auto-paginated gateway request for EVMIAS api
+    """
+    pagination: PaginationParams = Field(default_factory=PaginationParams)
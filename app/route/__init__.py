@@ -1,5 +1,9 @@
 from .gateway import router as gateway_router
+from .gateway_ws import router as gateway_ws_router
+from .admin import router as admin_router
 
 __all__ = [
     "gateway_router",
+    "gateway_ws_router",
+    "admin_router",
 ]
\ No newline at end of file
@@ -0,0 +1,91 @@
+# app/route/admin.py
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from app.core import get_admin_api_key, get_settings
+from app.core.profiling import profiling_lock, sample_cpu_profile, tracemalloc_diff
+
+settings = get_settings()
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(get_admin_api_key)])
+
+
+@router.get(
+    path="/loop-lag",
+    summary="Метрики задержки цикла событий воркера",
+    description="Накопительные метрики с момента старта воркера: последний, средний и максимальный лаг, "
+                "число зависаний дольше LOOP_STALL_THRESHOLD и гистограмма."
+)
+async def get_loop_lag(request: Request) -> Dict[str, Any]:
+    monitor = request.app.state.loop_monitor
+    if monitor is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Loop lag monitor is disabled")
+    return monitor.snapshot()
+
+
+@router.get(
+    path="/upstreams",
+    summary="Состояние узлов ЕВМИАС",
+    description="EWMA задержки и доли ошибок, число запросов в работе и статус исключения для каждого узла."
+)
+async def get_upstreams(request: Request) -> List[Dict[str, Any]]:
+    return [
+        {
+            "name": node.name,
+            "base_url": node.base_url,
+            "latency_ewma": node.latency_ewma,
+            "error_ewma": round(node.error_ewma, 4),
+            "in_flight": node.in_flight,
+            "consecutive_failures": node.consecutive_failures,
+            "ejected": node.ejected,
+        }
+        for node in request.app.state.upstream_pool.nodes
+    ]
+
+
+@router.post(
+    path="/profile/cpu",
+    summary="Снять семплирующий CPU-профиль цикла событий",
+    description="""
+    В течение `duration` секунд снимает стек потока цикла событий каждые `interval` секунд.
+
+    - `top_functions` — функции, на которых чаще всего заставал семплер (собственное время).
+    - `folded` — стеки в формате folded для flamegraph.pl / speedscope.
+    - Профилируется только воркер, принявший запрос.
+    """
+)
+async def profile_cpu(
+        duration: float = Query(default=5.0, gt=0, le=settings.PROFILE_MAX_DURATION),
+        interval: float = Query(default=0.005, ge=0.001, le=1.0),
+        top: int = Query(default=50, gt=0, le=1000),
+) -> Dict[str, Any]:
+    # Обработчик выполняется в потоке цикла событий — его и профилируем
+    loop_thread_id = threading.get_ident()
+    async with _exclusive_profile():
+        return await sample_cpu_profile(loop_thread_id, duration, interval, top)
+
+
+@router.post(
+    path="/profile/memory",
+    summary="Снять разницу снимков tracemalloc",
+    description="Сравнивает два снимка tracemalloc, снятые с интервалом `duration` секунд, "
+                "и возвращает места с наибольшим приростом выделенной памяти."
+)
+async def profile_memory(
+        duration: float = Query(default=10.0, gt=0, le=settings.PROFILE_MAX_DURATION),
+        top: int = Query(default=25, gt=0, le=500),
+        frames: int = Query(default=1, ge=1, le=50),
+) -> Dict[str, Any]:
+    async with _exclusive_profile():
+        return await tracemalloc_diff(duration, top, frames)
+
+
+@asynccontextmanager
+async def _exclusive_profile() -> AsyncIterator[None]:
+    """Не дает запустить второй профиль, пока идет первый."""
+    if profiling_lock.locked():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another profile is already running")
+    async with profiling_lock:
+        yield
@@ -1,11 +1,15 @@
 # app/route/gateway.py
-from typing import Annotated, Any
+from typing import Annotated, Any, Optional
 
 from fastapi import APIRouter, Depends, Request, Body
+from fastapi.responses import StreamingResponse
 
-from app.core import HTTPXClient, get_http_service, route_handler, get_settings, get_api_key
-from app.model.gateway import GatewayRequest
-from app.service import fetch_request
+from app.core import (
+    HTTPXClient, get_http_service, route_handler, get_settings, get_api_key, get_request_timeout, make_deadline,
+    run_until_disconnected
+)
+from app.model.gateway import GatewayRequest, PaginatedGatewayRequest
+from app.service import fetch_response, conditional_response, paginate_request
 
 settings = get_settings()
 router = APIRouter(prefix="/gateway", tags=["API gateway"], dependencies=[Depends(get_api_key)])
@@ -21,11 +25,18 @@ router = APIRouter(prefix="/gateway", tags=["API gateway"], dependencies=[Depend
     - В случае успеха возвращает JSON-ответ от ЕВМИАС.
     - В случае, если от ЕВМИАС не удалось получить валидный JSON 
       (например, из-за ошибки сессии), возвращает ошибку 502 Bad Gateway.
+    - Если задан `X-Request-Timeout` (или поле `timeout`) и время вышло, возвращает 504.
+      Работа с ЕВМИАС прекращается и при разрыве соединения клиентом.
+    - Ответ содержит `ETag`. Если он совпадает с `If-None-Match`, возвращается 304 без тела.
+    - С заголовком `A-IM: json-diff` для списков возвращается 226 с разницей
+      (`ops` по записям и `fields` с остальными полями) относительно версии из `If-None-Match`,
+      если она еще хранится в шлюзе.
     """
 )
 async def process_request(
         request: Request,
         http_service: Annotated[HTTPXClient, Depends(get_http_service)],
+        request_timeout: Annotated[Optional[float], Depends(get_request_timeout)],
         payload: GatewayRequest = Body(
             ...,
             example={
@@ -39,5 +50,53 @@ async def process_request(
             }
         )
 ) -> Any:
-    json_response = await fetch_request(payload, http_service)
-    return json_response
+    deadline = make_deadline(request_timeout)
+    response = await run_until_disconnected(request, fetch_response(payload, http_service, deadline))
+    return await conditional_response(
+        response,
+        if_none_match=request.headers.get("If-None-Match"),
+        a_im=request.headers.get("A-IM"),
+        redis_client=request.app.state.redis_client,
+        redis_degraded=request.app.state.session_store.degraded,
+    )
+
+
+@route_handler(debug=settings.DEBUG_ROUTE)
+@router.post(
+    path="/paginate",
+    summary="Выгрузить все страницы списка ЕВМИАС потоком NDJSON",
+    response_class=StreamingResponse,
+    description="""
+    Выполняет запрос к API ЕВМИАС постранично, подставляя смещение и размер страницы
+    в поля `data`, описанные в `pagination`.
+
+    - Страницы запрашиваются параллельно (не более `max_concurrency` одновременно).
+    - Записи отдаются по одной на строку (`application/x-ndjson`) в исходном порядке,
+      не дожидаясь загрузки остальных страниц.
+    - Ошибка первой страницы возвращается обычным HTTP-статусом; ошибка последующих —
+      последней строкой потока вида `{"error": ..., "start": ...}`.
+    """
+)
+async def process_paginated_request(
+        request: Request,
+        http_service: Annotated[HTTPXClient, Depends(get_http_service)],
+        request_timeout: Annotated[Optional[float], Depends(get_request_timeout)],
+        payload: PaginatedGatewayRequest = Body(
+            ...,
+            example={
+                "params": {
+                    "c": "Common",
+                    "m": "loadList"
+                },
+                "data": {},
+                "pagination": {
+                    "start_field": "start",
+                    "limit_field": "limit",
+                    "page_size": 100,
+                    "max_concurrency": 4
+                }
+            }
+        )
+) -> StreamingResponse:
+    stream = await paginate_request(payload, http_service, make_deadline(request_timeout))
+    return StreamingResponse(stream, media_type="application/x-ndjson")
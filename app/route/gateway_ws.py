@@ -0,0 +1,34 @@
+# app/route/gateway_ws.py
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, WebSocket
+
+from app.core import HTTPXClient, get_http_service, get_settings, get_ws_api_key
+from app.core.dependencies import WS_SUBPROTOCOL
+from app.service import serve_multiplexed
+
+settings = get_settings()
+router = APIRouter(prefix="/gateway", tags=["API gateway"], dependencies=[Depends(get_ws_api_key)])
+
+
+@router.websocket("/ws")
+async def process_ws(
+        websocket: WebSocket,
+        http_service: Annotated[HTTPXClient, Depends(get_http_service)],
+) -> None:
+    """
+    Постоянный канал для частых запросов к ЕВМИАС.
+
+    Аутентификация выполняется один раз при подключении. Далее клиент отправляет
+    сообщения вида `{"id": "...", "request": <GatewayRequest>}` и получает ответы
+    `{"id": "...", "status_code": 200, "data": ...}` или `{"id": "...", "status_code": ..., "error": ...}`
+    в порядке готовности. Число одновременно выполняемых запросов ограничено WS_MAX_IN_FLIGHT.
+
+    Браузерные клиенты передают ключ подпротоколом:
+    `new WebSocket(url, ["evmias-gateway", "x-api-key.<ключ>"])`. В ответ выбирается только
+    `evmias-gateway`, ключ обратно не отправляется.
+    """
+    # Если клиент запросил подпротоколы, браузер требует, чтобы сервер выбрал один из них
+    requested = websocket.scope.get("subprotocols", [])
+    await websocket.accept(subprotocol=WS_SUBPROTOCOL if WS_SUBPROTOCOL in requested else None)
+    await serve_multiplexed(websocket, http_service, settings.WS_MAX_IN_FLIGHT)
@@ -1,7 +1,14 @@
 from .auth.auth import perform_re_authentication
-from .gateway.gateway import fetch_request
+from .gateway.gateway import fetch_request, fetch_response
+from .gateway.etag import conditional_response
+from .gateway.multiplex import serve_multiplexed
+from .gateway.pagination import paginate_request
 
 __all__ = [
     "perform_re_authentication",
     "fetch_request",
+    "fetch_response",
+    "conditional_response",
+    "serve_multiplexed",
+    "paginate_request",
 ]
\ No newline at end of file
@@ -29,13 +29,12 @@ async def authorize_session(http_client: AsyncClient, cookies: Cookies) -> Cooki
     cookies.update(response.cookies)
     return cookies
 
-async def perform_re_authentication(http_client_instance) -> Dict[str, str]:
+async def perform_re_authentication(clean_http_client: AsyncClient) -> Dict[str, str]:
     """
     Оркестрирует процесс переаутентификации.
-    Принимает экземпляр нашего HTTPXClient, чтобы использовать его 'чистый' базовый http-клиент.
+    Принимает 'чистый' базовый http-клиент узла ЕВМИАС, для которого нужна сессия.
     """
     # Используем базовый httpx.AsyncClient для аутентификации, чтобы избежать рекурсивных вызовов fetch()
-    clean_http_client = http_client_instance.client
     initial_cookies = await warmup_session_and_fetch_initial_cookies(clean_http_client)
     final_cookies = await authorize_session(clean_http_client, initial_cookies)
     return dict(final_cookies)
\ No newline at end of file
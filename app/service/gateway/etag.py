@@ -0,0 +1,145 @@
+# app/service/gateway/etag.py
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import status
+from fastapi.responses import JSONResponse, Response
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import get_settings
+from app.core.logger_config import logger
+from app.service.gateway.pagination import extract_records
+
+settings = get_settings()
+
+# Дельта-кодирование по RFC 3229: клиент просит его заголовком `A-IM: json-diff`
+DIFF_IM = "json-diff"
+HTTP_226_IM_USED = 226
+
+
+def compute_etag(content: bytes) -> str:
+    """Сильный ETag по телу ответа ЕВМИАС (blake2b заметно быстрее sha256 и не требует зависимостей)."""
+    return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+
+
+def _parse_etags(header: Optional[str]) -> List[str]:
+    if not header:
+        return []
+    # Слабые валидаторы сравниваем как сильные: тело у нас детерминировано
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def _canonical(record: Any) -> str:
+    return json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+def diff_records(base: List[Any], current: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Упорядоченные операции, из которых собирается `current` по `base`:
+    `{"copy": [start, count]}` — взять `count` записей базы начиная с `start`,
+    `{"insert": [...]}` — вставить новые записи. Порядок записей сохраняется.
+    """
+    base_keys = [_canonical(record) for record in base]
+    first_index: Dict[str, int] = {}
+    for index, key in enumerate(base_keys):
+        first_index.setdefault(key, index)
+
+    ops: List[Dict[str, Any]] = []
+    previous: Optional[int] = None
+    for record in current:
+        key = _canonical(record)
+        if previous is not None and previous + 1 < len(base_keys) and base_keys[previous + 1] == key:
+            index = previous + 1
+        else:
+            index = first_index.get(key)
+
+        if index is None:
+            if ops and "insert" in ops[-1]:
+                ops[-1]["insert"].append(record)
+            else:
+                ops.append({"insert": [record]})
+        elif ops and "copy" in ops[-1] and previous is not None and index == previous + 1:
+            ops[-1]["copy"][1] += 1
+        else:
+            ops.append({"copy": [index, 1]})
+        previous = index
+    return ops
+
+
+async def _load_version(redis_client: Redis, etag: str) -> Optional[List[Any]]:
+    try:
+        raw = await redis_client.get(f"{settings.ETAG_DIFF_KEY_PREFIX}{etag}")
+    except RedisError as e:
+        logger.warning(f"[ETAG] Failed to load base version {etag}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def _store_version(redis_client: Redis, etag: str, records: List[Any]) -> bool:
+    """Сохраняет версию списка. Возвращает False, если Redis не ответил."""
+    raw = json.dumps(records, ensure_ascii=False)
+    if len(raw) > settings.ETAG_DIFF_MAX_BYTES:
+        logger.debug(f"[ETAG] Version {etag} is too large for diff mode ({len(raw)} bytes), not stored.")
+        return True
+    try:
+        await redis_client.set(f"{settings.ETAG_DIFF_KEY_PREFIX}{etag}", raw, ex=settings.ETAG_DIFF_TTL)
+    except RedisError as e:
+        logger.warning(f"[ETAG] Failed to store version {etag}: {e}")
+        return False
+    return True
+
+
+async def conditional_response(
+        response: Dict[str, Any],
+        if_none_match: Optional[str],
+        a_im: Optional[str],
+        redis_client: Redis,
+        redis_degraded: bool = False
+) -> Response:
+    """
+    Строит ответ шлюза с учетом условного запроса.
+
+    - Всегда проставляет `ETag` — хэш тела ответа ЕВМИАС.
+    - Если ETag совпал с `If-None-Match`, возвращает 304 без тела.
+    - Если клиент прислал `A-IM: json-diff`, ответ — список записей, а версия из `If-None-Match`
+      еще хранится в Redis, возвращает 226 с телом `{"base", "ops", "fields"}`: записи собираются
+      по `ops` (см. `diff_records`), а `fields` — остальные поля ответа (кроме `data`) или null,
+      если ЕВМИАС вернул голый список. Собранное тело совпадает с телом ответа 200 для `ETag`.
+      Пока хранилище сессии считает Redis недоступным (`redis_degraded`), дифф не строится,
+      чтобы не ждать таймаутов Redis на каждом запросе.
+    """
+    etag = compute_etag(response["content"])
+    headers = {"ETag": etag}
+    client_etags = _parse_etags(if_none_match)
+
+    if etag in client_etags or "*" in client_etags:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response_json = response["json"]
+    wants_diff = (
+        settings.ETAG_DIFF_ENABLED and not redis_degraded
+        and a_im and DIFF_IM in [im.strip() for im in a_im.split(",")]
+    )
+    records = extract_records(response_json, "data") if wants_diff else None
+    if records is None:
+        return JSONResponse(content=response_json, headers=headers)
+
+    if not await _store_version(redis_client, etag, records):
+        return JSONResponse(content=response_json, headers=headers)
+    for base_etag in client_etags:
+        base_records = await _load_version(redis_client, base_etag)
+        if base_records is None:
+            continue
+        fields = (
+            {key: value for key, value in response_json.items() if key != "data"}
+            if isinstance(response_json, dict) else None
+        )
+        return JSONResponse(
+            status_code=HTTP_226_IM_USED,
+            content={"base": base_etag, "ops": diff_records(base_records, records), "fields": fields},
+            headers={**headers, "IM": DIFF_IM, "Delta-Base": base_etag},
+        )
+
+    return JSONResponse(content=response_json, headers=headers)
@@ -1,8 +1,9 @@
 # app/service/proxy/proxy.py
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 from fastapi import HTTPException
 
 from app.core.config import get_settings
+from app.core.deadline import earliest, make_deadline
 from app.model import GatewayRequest
 
 if TYPE_CHECKING:
@@ -13,28 +14,44 @@ settings = get_settings()
 
 async def fetch_request(
         payload: GatewayRequest,
-        http_client: "HTTPXClient"
+        http_client: "HTTPXClient",
+        deadline: Optional[float] = None
 ):
+    response = await fetch_response(payload, http_client, deadline)
+    return response["json"]
+
+
+async def fetch_response(
+        payload: GatewayRequest,
+        http_client: "HTTPXClient",
+        deadline: Optional[float] = None
+) -> dict:
+    """Как fetch_request, но возвращает полный ответ HTTPXClient.fetch (статус, заголовки, тело)."""
     response = await http_client.fetch(
         url=payload.path,
         method=payload.method,
         params=payload.params.model_dump(),
         data=payload.data,
-        raise_for_status=False
+        raise_for_status=False,
+        deadline=earliest(deadline, make_deadline(payload.timeout))
     )
 
     response_json = response.get("json")
 
     if not response_json:
-        # Это единственная ошибка, за которую отвечает этот слой.
-        # Она означает "Не удалось установить связь и получить данные".
-        raise HTTPException(
-            status_code=502,  # Bad Gateway: "Мы, как шлюз, не смогли получить ответ от сервера за нами"
-            detail={
-                "error": "Failed to get a valid JSON response from EVMIAS",
-                "upstream_status_code": response.get("status_code"),
-                "upstream_response_text": response.get("text")
-            }
-        )
-
-    return response_json
+        raise upstream_error(response)
+
+    return response
+
+
+def upstream_error(response: dict) -> HTTPException:
+    # Это единственная ошибка, за которую отвечает этот слой.
+    # Она означает "Не удалось установить связь и получить данные".
+    return HTTPException(
+        status_code=502,  # Bad Gateway: "Мы, как шлюз, не смогли получить ответ от сервера за нами"
+        detail={
+            "error": "Failed to get a valid JSON response from EVMIAS",
+            "upstream_status_code": response.get("status_code"),
+            "upstream_response_text": response.get("text")
+        }
+    )
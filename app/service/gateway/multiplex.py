@@ -0,0 +1,95 @@
+# app/service/gateway/multiplex.py
+import asyncio
+import json
+from typing import TYPE_CHECKING, Any, Dict, Set, Union
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.core.logger_config import logger
+from app.model import GatewayRequest, GatewayWsMessage
+from app.service.gateway.gateway import fetch_request
+
+if TYPE_CHECKING:
+    from app.core import HTTPXClient
+
+
+async def serve_multiplexed(
+        websocket: WebSocket,
+        http_client: "HTTPXClient",
+        max_in_flight: int
+) -> None:
+    """
+    Обслуживает WebSocket-соединение, по которому клиент шлет много запросов к ЕВМИАС.
+
+    Каждое сообщение — GatewayWsMessage. Запросы выполняются конкурентно, ответы
+    отправляются по мере готовности (в произвольном порядке) с тем же `id`.
+    Одновременно выполняется не более `max_in_flight` запросов: пока все слоты заняты,
+    новые сообщения из сокета не читаются, и клиент упирается в backpressure.
+    """
+    slots = asyncio.Semaphore(max_in_flight)
+    send_lock = asyncio.Lock()
+    tasks: Set[asyncio.Task] = set()
+
+    async def send(message: Dict[str, Any]) -> None:
+        # Starlette не допускает конкурентную запись в один сокет
+        async with send_lock:
+            try:
+                await websocket.send_json(message)
+            except (WebSocketDisconnect, RuntimeError) as e:
+                logger.debug(f"[WS] Failed to send response {message.get('id')}: {e}")
+
+    async def handle(message_id: str, payload: GatewayRequest) -> None:
+        try:
+            data = await fetch_request(payload, http_client)
+            await send({"id": message_id, "status_code": 200, "data": data})
+        except HTTPException as e:
+            await send({"id": message_id, "status_code": e.status_code, "error": e.detail})
+        except Exception as e:
+            logger.error(f"[WS] ❌ Unexpected error for request {message_id}: {e}")
+            await send({"id": message_id, "status_code": 500, "error": str(e)})
+        finally:
+            slots.release()
+
+    try:
+        while True:
+            await slots.acquire()
+            raw = await _receive_frame(websocket)
+            try:
+                message = GatewayWsMessage.model_validate_json(raw)
+            except ValidationError as e:
+                slots.release()
+                await send({"id": _extract_id(raw), "status_code": 422, "error": json.loads(e.json())})
+                continue
+
+            task = asyncio.create_task(handle(message.id, message.request))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except WebSocketDisconnect as e:
+        logger.info(f"[WS] Client disconnected (code {e.code}), cancelling {len(tasks)} in-flight request(s).")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _receive_frame(websocket: WebSocket) -> Union[str, bytes]:
+    """
+    Принимает текстовый или бинарный кадр. Бинарный кадр разбирается как JSON в UTF-8,
+    как и текстовый; невалидное содержимое получит ответ 422, а не обрыв соединения.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    if message.get("text") is not None:
+        return message["text"]
+    return message.get("bytes") or b""
+
+
+def _extract_id(raw: Union[str, bytes]) -> Any:
+    """Пытается достать `id` из невалидного сообщения, чтобы клиент мог сопоставить ошибку."""
+    try:
+        parsed = json.loads(raw)
+    except ValueError:  # JSONDecodeError или UnicodeDecodeError для бинарного кадра
+        return None
+    return parsed.get("id") if isinstance(parsed, dict) else None
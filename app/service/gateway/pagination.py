@@ -0,0 +1,189 @@
+# app/service/gateway/pagination.py
+import asyncio
+import json
+from collections import deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Deque, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.core.config import get_settings
+from app.core.deadline import earliest, make_deadline
+from app.core.logger_config import logger
+from app.model import PaginatedGatewayRequest, PaginationParams
+from app.service.gateway.gateway import upstream_error
+
+if TYPE_CHECKING:
+    from app.core import HTTPXClient
+
+settings = get_settings()
+
+
+def extract_records(response_json: Any, records_field: Optional[str]) -> Optional[List[Any]]:
+    """Достает список записей из ответа ЕВМИАС (сам список или поле `records_field`)."""
+    if isinstance(response_json, list):
+        return response_json
+    if isinstance(response_json, dict) and records_field and isinstance(response_json.get(records_field), list):
+        return response_json[records_field]
+    return None
+
+
+async def _fetch_page(
+        payload: PaginatedGatewayRequest,
+        http_client: "HTTPXClient",
+        start: int,
+        deadline: Optional[float]
+) -> Tuple[List[Any], Optional[int]]:
+    """Запрашивает одну страницу. Возвращает записи и общее число записей (если ЕВМИАС его сообщает)."""
+    pagination = payload.pagination
+    data = {**(payload.data or {}), pagination.start_field: start, pagination.limit_field: pagination.page_size}
+
+    response = await http_client.fetch(
+        url=payload.path,
+        method=payload.method,
+        params=payload.params.model_dump(),
+        data=data,
+        raise_for_status=False,
+        deadline=deadline
+    )
+
+    response_json = response.get("json")
+    records = extract_records(response_json, pagination.records_field)
+    if records is None:
+        raise upstream_error(response)
+
+    total = None
+    if isinstance(response_json, dict) and pagination.total_field:
+        try:
+            total = int(response_json[pagination.total_field])
+        except (KeyError, TypeError, ValueError):
+            total = None
+    return records, total
+
+
+def _encode_page(records: List[Any]) -> bytes:
+    return b"".join(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n" for record in records)
+
+
+def _encode_error(detail: Any, start: int) -> bytes:
+    return json.dumps({"error": detail, "start": start}, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _short_page_error(start: int, received: int, page_size: int, total: int) -> dict:
+    """Страница короче запрошенной, хотя записи еще есть: ЕВМИАС, видимо, урезал limit."""
+    return {
+        "error": "EVMIAS returned a short page before reaching totalCount",
+        "page_size": page_size,
+        "received": received,
+        "total": total,
+        "remedy": "Decrease pagination.page_size to the limit EVMIAS actually honours."
+    }
+
+
+async def paginate_request(
+        payload: PaginatedGatewayRequest,
+        http_client: "HTTPXClient",
+        deadline: Optional[float] = None
+) -> AsyncIterator[bytes]:
+    """
+    Запрашивает первую страницу сразу (чтобы ошибка вернулась клиенту обычным HTTP-статусом)
+    и возвращает генератор NDJSON со всеми записями по порядку.
+    Дедлайн (из заголовка или `payload.timeout`) действует на всю выгрузку целиком.
+    """
+    deadline = earliest(deadline, make_deadline(payload.timeout))
+    first_records, total = await _fetch_page(payload, http_client, 0, deadline)
+    page_size = payload.pagination.page_size
+    if total is not None and len(first_records) < min(page_size, total):
+        raise HTTPException(status_code=502, detail=_short_page_error(0, len(first_records), page_size, total))
+    return _stream_pages(payload, http_client, first_records, total, deadline)
+
+
+async def _stream_pages(
+        payload: PaginatedGatewayRequest,
+        http_client: "HTTPXClient",
+        first_records: List[Any],
+        total: Optional[int],
+        deadline: Optional[float]
+) -> AsyncIterator[bytes]:
+    """
+    Отдает записи в порядке страниц, пока следующие страницы догружаются.
+
+    Одновременно в памяти не больше `max_concurrency` страниц: новая страница запрашивается
+    только после того, как самая ранняя отдана клиенту. Если ЕВМИАС не сообщил общее число
+    записей, выгрузка заканчивается на первой неполной странице.
+
+    Ошибка посреди выгрузки отдается последней строкой вида `{"error": ..., "start": ...}`.
+    Так же завершается выгрузка, если данные нельзя выгрузить целиком без потерь:
+    страница короче запрошенной до достижения totalCount, страница повторяет предыдущую
+    (ЕВМИАС игнорирует поле смещения) или достигнут серверный предел PAGINATION_MAX_PAGES.
+    """
+    pagination: PaginationParams = payload.pagination
+    page_size = pagination.page_size
+    max_pages = min(pagination.max_pages or settings.PAGINATION_MAX_PAGES, settings.PAGINATION_MAX_PAGES)
+    capped_by_server = pagination.max_pages is None or pagination.max_pages > settings.PAGINATION_MAX_PAGES
+
+    yield _encode_page(first_records)
+    if len(first_records) < page_size:
+        return
+
+    pages_requested = 1
+    next_start = page_size
+    previous_records = first_records
+    pending: Deque[Tuple[int, asyncio.Task]] = deque()
+
+    def has_more() -> bool:
+        return total is None or next_start < total
+
+    def can_schedule() -> bool:
+        return pages_requested < max_pages and has_more()
+
+    def schedule() -> None:
+        nonlocal pages_requested, next_start
+        task = asyncio.create_task(_fetch_page(payload, http_client, next_start, deadline))
+        pending.append((next_start, task))
+        pages_requested += 1
+        next_start += page_size
+
+    try:
+        while len(pending) < pagination.max_concurrency and can_schedule():
+            schedule()
+
+        while pending:
+            start, task = pending.popleft()
+            try:
+                records, _ = await task
+            except HTTPException as e:
+                logger.warning(f"[PAGINATE] Page at {start} failed: {e.status_code} - {e.detail}")
+                yield _encode_error(e.detail, start)
+                return
+
+            if records and records == previous_records:
+                logger.warning(f"[PAGINATE] Page at {start} repeats the previous page, paging field is ignored.")
+                yield _encode_error({
+                    "error": "EVMIAS returned the same page twice",
+                    "remedy": f"Check that '{pagination.start_field}' is the offset field of this method."
+                }, start)
+                return
+
+            if total is not None and len(records) < page_size and start + len(records) < total:
+                logger.warning(f"[PAGINATE] Short page at {start}: {len(records)} of {page_size}, total {total}.")
+                yield _encode_error(_short_page_error(start, len(records), page_size, total), start)
+                return
+
+            yield _encode_page(records)
+            previous_records = records
+
+            if len(records) < page_size:
+                return
+            if can_schedule():
+                schedule()
+
+        if capped_by_server and has_more():
+            logger.warning(f"[PAGINATE] Export stopped at the server limit of {max_pages} pages.")
+            yield _encode_error({
+                "error": f"Export stopped at the server limit of {max_pages} pages",
+                "remedy": "Narrow the request or increase PAGINATION_MAX_PAGES."
+            }, next_start)
+    finally:
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)